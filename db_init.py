@@ -1,6 +1,49 @@
 import os
 import sys
 
+# Schema - sent as a single multi-statement batch (no parameters, so psycopg2 allows it)
+SCHEMA_DDL = """
+CREATE TABLE IF NOT EXISTS secret_keys (
+    id SERIAL PRIMARY KEY,
+    private_key TEXT,
+    source TEXT,
+    device TEXT,
+    status TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS app_settings (
+    id SERIAL PRIMARY KEY,
+    key TEXT UNIQUE,
+    value TEXT
+);
+
+CREATE TABLE IF NOT EXISTS permanent_verified (
+    address TEXT PRIMARY KEY,
+    verified_at TIMESTAMP,
+    expires_at TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS auto_claim_schedule (
+    address TEXT,
+    network TEXT,
+    enabled BOOLEAN,
+    last_claim TIMESTAMP,
+    next_claim_time TIMESTAMP,
+    PRIMARY KEY (address, network)
+);
+
+-- The primary key is the index behind /api/check-key-status lookups
+CREATE TABLE IF NOT EXISTS disabled_keys (
+    key_address TEXT PRIMARY KEY,
+    reason TEXT
+);
+
+-- /api/fetch-keys lists keys newest first
+CREATE INDEX IF NOT EXISTS idx_secret_keys_created_at
+ON secret_keys(created_at DESC);
+"""
+
 def run():
     database_url = os.environ.get("DATABASE_URL")
     if not database_url:
@@ -12,50 +55,20 @@ def run():
         conn = psycopg2.connect(database_url)
         cur = conn.cursor()
 
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS secret_keys (
-            id SERIAL PRIMARY KEY,
-            private_key TEXT,
-            source TEXT,
-            device TEXT,
-            status TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-        """)
-
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS app_settings (
-            id SERIAL PRIMARY KEY,
-            key TEXT UNIQUE,
-            value TEXT
-        );
-        """)
-
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS permanent_verified (
-            address TEXT PRIMARY KEY,
-            verified_at TIMESTAMP,
-            expires_at TIMESTAMP
-        );
-        """)
-
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS auto_claim_schedule (
-            address TEXT,
-            network TEXT,
-            enabled BOOLEAN,
-            last_claim TIMESTAMP,
-            next_claim_time TIMESTAMP,
-            PRIMARY KEY (address, network)
-        );
-        """)
+        # All tables and indexes in one round-trip; committed together below
+        cur.execute(SCHEMA_DDL)
 
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS disabled_keys (
-            key_address TEXT PRIMARY KEY,
-            reason TEXT
-        );
-        """)
+        # /api/save-keys relies on this for ON CONFLICT DO NOTHING deduplication.
+        # Existing duplicate rows make it fail, so don't let that abort the rest of init.
+        cur.execute("SAVEPOINT unique_private_key")
+        try:
+            cur.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_secret_keys_private_key
+            ON secret_keys(private_key);
+            """)
+        except psycopg2.Error as e:
+            cur.execute("ROLLBACK TO SAVEPOINT unique_private_key")
+            print("DB init warning: duplicate private_key rows, saved keys will not be deduplicated:", e, file=sys.stderr)
 
         conn.commit()
         cur.close()
@@ -2,21 +2,73 @@
 import http.server
 import os
 import json
-import socketserver
 from urllib.parse import urlparse, parse_qs
 from pathlib import Path
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import sys
+import re
+import socket
 try:
     import tweepy
 except ImportError:
     tweepy = None
 import sqlite3
+import threading
+import time
 import hashlib
 import hmac
-from datetime import datetime, timedelta
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+# orjson is several times faster and emits bytes directly; stdlib json is the fallback
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson:
+    def json_dumps(obj):
+        """Serialize to UTF-8 JSON bytes"""
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            # e.g. integers beyond 64 bits in upstream faucet responses
+            return json.dumps(obj).encode()
+    json_loads = orjson.loads
+else:
+    def json_dumps(obj):
+        """Serialize to UTF-8 JSON bytes"""
+        return json.dumps(obj).encode()
+    json_loads = json.loads
 
 PORT = int(os.environ.get('PORT', 5000))
+# Per-request tracing ([API]/[Chat]/[Success] lines) is only emitted with DEBUG=1
+DEBUG = os.environ.get('DEBUG', '').lower() in ('1', 'true', 'yes')
+
+class _DeferredQueueHandler(QueueHandler):
+    """QueueHandler that enqueues records as-is, leaving %-formatting to the listener thread"""
+    def prepare(self, record):
+        # The stock prepare() formats the message on the caller's thread so records can be
+        # pickled; ours never leave the process
+        return record
+
+# Handlers only enqueue log records; a single listener thread formats them and writes stderr
+_log_queue = queue.SimpleQueue()
+_log_stream = logging.StreamHandler(sys.stderr)
+_log_stream.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+_log_listener = QueueListener(_log_queue, _log_stream)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+log = logging.getLogger('gooddollar')
+log.addHandler(_DeferredQueueHandler(_log_queue))
+log.setLevel(logging.DEBUG if DEBUG else logging.INFO)
+log.propagate = False
 # Use the API key from environment (no fallback to prevent using leaked keys)
 GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY', '')
 
@@ -34,71 +86,552 @@ GOODDOLLAR_CONFIG = {
     }
 }
 
+# Chatbot knowledge base and prompt - built once; /api/chat only appends the user's message
+KNOWLEDGE_BASE = """
+এই App সম্পর্কে জানুন:
+
+🔗 **Batch Claim:**
+- একসাথে ১০০+ Wallet থেকে GoodDollar Claim করুন
+- Private key paste করুন বা CSV upload করুন
+- Auto-claim সব Wallet এ একসাথে চলে
+- রেজাল্ট লাইভ দেখা যায় - হ্যাশ, Status, Amount সব
+
+💰 **Batch Token Collection:**
+- সব Wallet থেকে G$ টোকেন একটা Destination এ নিয়ে আসুন
+- Master Wallet সেট করুন destination হিসেবে
+- একসাথে ১০০+ থেকে জমা করতে পারেন
+- লাইভ ট্র্যাকিং - কে সফল, কে ফেইল
+
+🧮 **Balance Checker:**
+- একসাথে অনেক Wallet এর Balance দেখুন
+- Native Token (CELO/XDC) এবং G$ উভয় দেখা যায়
+- CSV এ Export করা যায়
+- রিয়েল-টাইম রেট সহ
+
+👛 **Master Wallet:**
+- একটা বড় Wallet যা destination এর জন্য ব্যবহার হয়
+- Password দিয়ে protect করা যায়
+- Batch Token Collection এ এটা use হয়
+
+⚙️ **Swap:**
+- Celo Network এ Uniswap/Ubeswap ব্যবহার করুন
+- XDC Network এ XSwap ব্যবহার করুন
+- Direct Wallet থেকে Swap করুন
+- Real price update হয়
+
+📊 **আরও তথ্য:**
+- সব Operation এ RPC URL পরিবর্তন করা যায়
+- CSV বা একটা একটা key import করা যায়
+- সব রেজাল্ট Transaction Hash সহ দেখা যায়
+"""
+
+PROMPT_PREFIX = f"""তুমি একজন মজাদার এবং বন্ধুত্বপূর্ণ বাংলা চ্যাটবট যার নাম GoodDollar Helper! 🤖
+তুমি সবসময় বাংলায় উত্তর দিবে এবং খুবই ফ্রেন্ডলি টোনে কথা বলবে। মজা করতে পারো, emoji ব্যবহার করতে পারো, জোকস বলতে পারো!
+ব্যবহারকারী বাংলা, ইংরেজি বা বাংলিশ ব্যবহার করতে পারে কিন্তু তুমি শুধুমাত্র বাংলায় এবং খুবই বন্ধুসুলভ টোনে উত্তর দেবে।
+
+তোমার বিস্তারিত জ্ঞান:
+{KNOWLEDGE_BASE}
+
+নির্দেশনা:
+- প্রথমে ব্যবহারকারীর প্রশ্ন বুঝো এবং উপরের জ্ঞান থেকে সঠিক উত্তর খুঁজে বের করো
+- যদি App সম্পর্কে প্রশ্ন হয়, বিস্তারিত সাহায্য করো
+- যদি সমস্যা হয়, বলো: "☎️ SMS করুন 01892564963 তে সাহায্যের জন্য!"
+- সবসময় হালকা, মজাদার এবং বন্ধুসুলভ থাকো
+- কখনো সিরিয়াস হবে না
+
+ব্যবহারকারীর প্রশ্ন: """
+
+GEMINI_URL = f'https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent?key={GEMINI_API_KEY}'
+
+GEMINI_STREAM_URL = f'https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:streamGenerateContent?alt=sse&key={GEMINI_API_KEY}'
+
+# Pre-serialized bodies for fixed responses
+INVALID_PWD_BYTES = json_dumps({'error': 'Invalid password'})
+INVALID_LENGTH_BYTES = json_dumps({'error': 'Invalid Content-Length'})
+BODY_TOO_LARGE_BYTES = json_dumps({'error': 'Request body too large'})
+NO_MESSAGE_BYTES = json_dumps({'error': 'No message'})
+API_ERROR_BYTES = json_dumps({'error': 'API Error'})
+INVALID_KEYS_BYTES = json_dumps({'error': 'Invalid keys format'})
+NO_KEYS_BYTES = json_dumps({'keys': []})
+DATABASE_FAILED_BYTES = json_dumps({'error': 'Database connection failed'})
+DB_FAILED_BYTES = json_dumps({'error': 'DB connection failed'})
+DB_ERROR_BYTES = json_dumps({'error': 'DB Error'})
+ADDRESS_REQUIRED_BYTES = json_dumps({'error': 'Address required'})
+INVALID_ADDRESS_BYTES = json_dumps({'error': 'Invalid address'})
+ADDRESS_ACTION_REQUIRED_BYTES = json_dumps({'error': 'Address and action required'})
+X_MISSING_INPUT_BYTES = json_dumps({'success': False, 'error': 'Missing message or API key'})
+X_INVALID_CREDENTIALS_BYTES = json_dumps({'success': False, 'error': 'Invalid JSON credentials. Need: api_key, api_secret, access_token, access_token_secret'})
+NOT_FOUND_BYTES = json_dumps({'error': 'Not found'})
+MAINTENANCE_ON_BYTES = json_dumps({'maintenance_mode': True})
+MAINTENANCE_OFF_BYTES = json_dumps({'maintenance_mode': False})
+# Filled by byte formatting - only for values already validated to need no JSON escaping
+KEY_STATUS_TEMPLATE = b'{"disabled":%s,"address":"%s"}'
+CONFIG_BYTES = json_dumps({'GEMINI_API_KEY': GEMINI_API_KEY})
+
+# Request body limits - /api/save-keys may carry large key batches
+MAX_BODY = 1 << 20  # 1 MB
+MAX_SAVE_KEYS_BODY = 16 << 20  # 16 MB
+BODY_CHUNK_SIZE = 64 * 1024
+
+# SQLite WAL mode persists on the database file, so it only needs setting once per process
+_wal_initialized = False
+
+# One SQLite connection per thread, reused across requests
+_sqlite_local = threading.local()
+
+# PostgreSQL (Render/production) is used whenever DATABASE_URL points at it - no SQLite fallback
+_database_url = os.environ.get('DATABASE_URL')
+PG_MODE = bool(_database_url and 'postgresql' in _database_url)
+
+# Process-wide PostgreSQL pool (Render/production), created lazily so an unreachable database
+# at boot is retried on the next request. The semaphore makes checkout wait for a free
+# connection instead of raising PoolError.
+PG_POOL = None
+PG_POOL_MAX = 32  # per process; request threads beyond this wait for a free slot
+PG_CHECKOUT_TIMEOUT = 10
+# Connections idle longer than this are pinged before reuse - servers drop idle connections,
+# and psycopg2 only notices (conn.closed) after an operation on them fails
+PG_PING_AFTER = 30
+_pg_pool_lock = threading.Lock()
+_pg_slots = threading.BoundedSemaphore(PG_POOL_MAX)
+_pg_last_used = {}
+_pg_connection_errors = ()
+
+def _get_pg_pool():
+    global PG_POOL, _pg_connection_errors
+    if PG_POOL is None:
+        with _pg_pool_lock:
+            if PG_POOL is None:
+                import psycopg2
+                import psycopg2.pool
+                _pg_connection_errors = (psycopg2.OperationalError, psycopg2.InterfaceError)
+                # Remove sslmode from URL if present for connection
+                PG_POOL = psycopg2.pool.ThreadedConnectionPool(
+                    minconn=min(2, PG_POOL_MAX),
+                    maxconn=PG_POOL_MAX,
+                    dsn=_database_url.replace('?sslmode=require', '')
+                )
+    return PG_POOL
+
+def _pg_ping(conn):
+    try:
+        with conn.cursor() as cur:
+            cur.execute('SELECT 1')
+        conn.rollback()
+        return True
+    except _pg_connection_errors:
+        return False
+
+def _checkout_pg_connection(pool):
+    if not _pg_slots.acquire(timeout=PG_CHECKOUT_TIMEOUT):
+        raise RuntimeError('Database connection pool exhausted')
+    try:
+        # Replace dropped connections; bounded so a dead database can't spin forever
+        for _ in range(PG_POOL_MAX + 1):
+            conn = pool.getconn()
+            idle = time.monotonic() - _pg_last_used.pop(id(conn), 0)
+            if not conn.closed and (idle < PG_PING_AFTER or _pg_ping(conn)):
+                return conn
+            pool.putconn(conn, close=True)
+        raise RuntimeError('No healthy database connection')
+    except Exception:
+        _pg_slots.release()
+        raise
+
+def _open_sqlite_connection():
+    global _wal_initialized
+    db_path = os.path.expanduser('~/gooddollar.db')
+    # Autocommit: single statements don't open an implicit transaction; batches BEGIN explicitly
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    if not _wal_initialized:
+        # WAL lets readers and writers run concurrently with one fsync per commit
+        conn.execute('PRAGMA journal_mode=WAL')
+        _wal_initialized = True
+    # The remaining pragmas are per-connection and must be applied every time
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    conn.execute('PRAGMA cache_size=-20000')  # 20 MB
+    conn.execute('PRAGMA busy_timeout=5000')
+    return conn
+
 # Database connection - supports both SQLite (local) and PostgreSQL (Render)
 def get_db_connection():
     try:
-        # Try PostgreSQL first (Render/production)
-        database_url = os.environ.get('DATABASE_URL')
-        if database_url and 'postgresql' in database_url:
-            try:
-                # Remove sslmode from URL if present for connection
-                db_url = database_url.replace('?sslmode=require', '')
-                import psycopg2
-                conn = psycopg2.connect(db_url)
-                return conn
-            except:
-                pass
+        # PostgreSQL (Render/production) - failures surface as None, never as a silent SQLite switch
+        if PG_MODE:
+            return _checkout_pg_connection(_get_pg_pool())
         
-        # Fall back to SQLite (local development)
-        db_path = os.path.expanduser('~/gooddollar.db')
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
+        # SQLite (local development)
+        conn = getattr(_sqlite_local, 'conn', None)
+        if conn is None:
+            conn = _sqlite_local.conn = _open_sqlite_connection()
         return conn
     except Exception as e:
-        print(f"❌ Database error: {e}", file=sys.stderr)
+        log.error(f"❌ Database error: {e}")
         return None
 
+def release_db_connection(conn, discard=False):
+    """Return a connection to the pool (PostgreSQL) or reset it for reuse (SQLite)"""
+    if isinstance(conn, sqlite3.Connection):
+        if conn.in_transaction:
+            conn.rollback()
+        return
+    try:
+        discard = discard or bool(conn.closed)
+        if not discard:
+            if conn.autocommit:
+                # The pool hands connections back as-is; everyone else expects a transaction
+                conn.autocommit = False
+            _pg_last_used[id(conn)] = time.monotonic()
+        PG_POOL.putconn(conn, close=discard)
+    finally:
+        _pg_slots.release()
+
+@contextmanager
+def db_conn(autocommit=False):
+    """Check out a database connection for the duration of a request (None if unavailable).
+
+    autocommit=True suits single-statement writes: each execute commits on its own, saving the
+    separate COMMIT round-trip. SQLite connections are always in autocommit mode.
+    """
+    conn = get_db_connection()
+    if autocommit and conn and PG_MODE:
+        conn.autocommit = True
+    discard = False
+    try:
+        yield conn
+    except _pg_connection_errors:
+        discard = True
+        raise
+    finally:
+        if conn:
+            release_db_connection(conn, discard)
+
+# In-process copies of disabled_keys and app_settings - both are read on every status poll but
+# only change through /api/toggle-key-status and /api/set-maintenance-mode, which update them in
+# place. Loaded on first use and reloaded after STATE_TTL so writes from other processes show up.
+STATE_TTL = 60
+DISABLED_SET = set()
+SETTINGS = {}
+_state_lock = threading.Lock()
+_state_loaded_at = None
+_state_version = 0  # bumped by local writes so a reload that raced one is discarded
+
+def _load_state():
+    """Reload DISABLED_SET and SETTINGS from the database; False if it is unavailable"""
+    global DISABLED_SET, SETTINGS, _state_loaded_at
+    version = _state_version
+    with db_conn() as conn:
+        if not conn:
+            return False
+        cursor = conn.cursor()
+        cursor.execute(SQL_LOAD_DISABLED)
+        disabled = {r[0] for r in cursor.fetchall()}
+        cursor.execute(SQL_LOAD_SETTINGS)
+        settings = {r[0]: r[1] for r in cursor.fetchall()}
+        cursor.close()
+    with _state_lock:
+        if version == _state_version:
+            DISABLED_SET, SETTINGS = disabled, settings
+            _state_loaded_at = time.monotonic()
+    return True
+
+def ensure_state():
+    """Make sure the cached tables are loaded and not older than STATE_TTL (False if never loaded)"""
+    loaded_at = _state_loaded_at
+    if loaded_at is not None and time.monotonic() - loaded_at < STATE_TTL:
+        return True
+    try:
+        _load_state()
+    except Exception as e:
+        # A failed refresh keeps serving the previous copy
+        log.error(f"❌ State reload error: {e}")
+    return _state_loaded_at is not None
+
+def update_state(disable=None, enable=None, settings=None):
+    """Apply a committed write to the cached tables"""
+    global _state_version
+    with _state_lock:
+        _state_version += 1
+        if disable:
+            DISABLED_SET.add(disable)
+        if enable:
+            DISABLED_SET.discard(enable)
+        if settings:
+            SETTINGS.update(settings)
+
+# Shared HTTP session for Gemini and faucet calls - keeps TLS connections alive between requests.
+# Bodies go through json_dumps/json_loads (orjson) rather than requests' json=/.json() helpers.
+# Retries cover connection failures; POSTs aren't retried on error statuses (not idempotent).
+HTTP = requests.Session()
+HTTP.headers.update({'Content-Type': 'application/json'})
+_http_adapter = HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=32,
+    max_retries=Retry(total=2, backoff_factor=0.1, status_forcelist=[502, 503, 504])
+)
+HTTP.mount('https://', _http_adapter)
+HTTP.mount('http://', _http_adapter)
+
+class _TimeoutAdapter(HTTPAdapter):
+    """HTTPAdapter that applies a default timeout when the caller passes none"""
+    def __init__(self, *args, timeout=10, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+    
+    def send(self, request, timeout=None, **kwargs):
+        return super().send(request, timeout=timeout or self.timeout, **kwargs)
+
+# Session handed to tweepy.Client for /api/x-post - reuses the TLS connection to api.twitter.com
+# between posts (Tweepy sends no timeout of its own). No retries: a resent POST could publish twice.
+X_SESSION = requests.Session()
+X_SESSION.mount('https://', _TimeoutAdapter(pool_connections=10, pool_maxsize=20, timeout=10))
+
+# Local copy of X's per-user tweet quota, so exhausted credentials get an immediate error instead
+# of a round-trip that can only come back 429. Keyed by a digest of the access token (never the
+# token itself) and resynced from the x-rate-limit-* headers of every response.
+X_RATE_LIMIT = 50
+X_RATE_WINDOW = 900  # seconds
+_x_rate_lock = threading.Lock()
+_x_rate = {}  # token digest -> [posts remaining, window reset (time.monotonic())]
+
+def x_rate_acquire(key):
+    """Take one post from the bucket; returns 0, or the seconds left in the window if it is empty"""
+    now = time.monotonic()
+    with _x_rate_lock:
+        bucket = _x_rate.get(key)
+        if bucket is None or now >= bucket[1]:
+            if len(_x_rate) >= 1024:
+                # Forget credentials whose window has already ended
+                for k in [k for k, b in _x_rate.items() if now >= b[1]]:
+                    del _x_rate[k]
+            bucket = _x_rate[key] = [X_RATE_LIMIT, now + X_RATE_WINDOW]
+        if bucket[0] <= 0:
+            return bucket[1] - now
+        bucket[0] -= 1
+        return 0
+
+def x_rate_update(key, headers):
+    """Replace the local estimate with X's authoritative remaining/reset values, when present"""
+    try:
+        remaining = int(headers['x-rate-limit-remaining'])
+        reset = int(headers['x-rate-limit-reset'])  # epoch seconds
+    except (KeyError, TypeError, ValueError):
+        return
+    with _x_rate_lock:
+        _x_rate[key] = [remaining, time.monotonic() + max(reset - time.time(), 0)]
+
+def _q(sql):
+    """Translate qmark placeholders to psycopg2's %s paramstyle when running on PostgreSQL.
+
+    This is a plain text substitution: keep literal '?' (and '%') characters out of SQL passed
+    through here and bind such values as parameters instead.
+    """
+    return sql.replace('?', '%s') if PG_MODE else sql
+
+# CELO faucets tried by /api/claim-celo, in order of preference
+CELO_FAUCETS = [
+    {
+        'source': 'Stakely',
+        'url': 'https://stakely.io/api/v1/faucet/claim',
+        'payload': lambda address: {'address': address, 'blockchain': 'celo'},
+        'unavailable': 'Faucet rate limited or unavailable'
+    },
+    {
+        'source': 'AllThatNode',
+        'url': 'https://www.allthatnode.com/api/v1/faucet/celo/request',
+        'payload': lambda address: {'address': address},
+        'unavailable': 'Faucet unavailable'
+    }
+]
+
+def request_faucet(faucet, address):
+    """POST a claim to one faucet and summarize the outcome"""
+    try:
+        response = HTTP.post(faucet['url'], data=json_dumps(faucet['payload'](address)), timeout=10)
+        if response.status_code == 200:
+            return {'source': faucet['source'], 'success': True, 'data': json_loads(response.content)}
+        return {'source': faucet['source'], 'success': False, 'error': faucet['unavailable']}
+    except Exception:
+        return {'source': faucet['source'], 'success': False, 'error': 'Connection failed'}
+
+# Lowercased EVM address; checked before any DB or faucet round-trip
+_ADDR_RE = re.compile(r'^0x[0-9a-f]{40}$')
+
+def _norm_addr(address):
+    """Strip and lowercase an address, without copying it when the client already did"""
+    address = address.strip()
+    return address if address.isascii() and address.islower() else address.lower()
+
+# Rows per multi-VALUES INSERT statement in /api/save-keys (PostgreSQL)
+SAVE_KEYS_PAGE_SIZE = 500
+
+# Next auto-claim is 1 day 12 minutes out, computed by the database (dialects differ)
+NEXT_CLAIM_SQLITE = "datetime('now', '+1 day', '+12 minutes')"
+NEXT_CLAIM_PG = "CURRENT_TIMESTAMP + INTERVAL '1 day 12 minutes'"
+
+# Rows per fetchmany() batch in /api/fetch-keys
+FETCH_KEYS_BATCH_SIZE = 1000
+
+# Handler SQL, built once for the active backend: the placeholder translation runs at import
+# instead of per request, and every statement passed through _q() can be audited here
+SQL_UPSERT_VERIFIED = _q('''
+    INSERT INTO permanent_verified (address, verified_at, expires_at)
+    VALUES (?, CURRENT_TIMESTAMP, NULL)
+    ON CONFLICT (address) DO UPDATE
+    SET verified_at = CURRENT_TIMESTAMP, expires_at = NULL
+''')
+SQL_LIST_VERIFIED = 'SELECT address, verified_at FROM permanent_verified ORDER BY verified_at DESC'
+SQL_UPSERT_AUTO_CLAIM = _q(f'''
+    INSERT INTO auto_claim_schedule (address, network, enabled, last_claim, next_claim_time)
+    VALUES (?, ?, ?, CURRENT_TIMESTAMP, {NEXT_CLAIM_PG if PG_MODE else NEXT_CLAIM_SQLITE})
+    ON CONFLICT (address, network)
+    DO UPDATE SET enabled = EXCLUDED.enabled, next_claim_time = EXCLUDED.next_claim_time
+''')
+SQL_INSERT_KEYS_SQLITE = 'INSERT OR IGNORE INTO secret_keys (private_key, source, device, status) VALUES (?, ?, ?, ?)'
+SQL_INSERT_KEYS_PG = 'INSERT INTO secret_keys (private_key, source, device, status) VALUES %s ON CONFLICT DO NOTHING'
+SQL_FETCH_KEYS = '''
+    SELECT private_key, created_at, source, device, status
+    FROM secret_keys
+    ORDER BY created_at DESC
+'''
+SQL_CLEAR_KEYS = 'DELETE FROM secret_keys'
+SQL_LOAD_DISABLED = 'SELECT key_address FROM disabled_keys'
+SQL_LOAD_SETTINGS = 'SELECT key, value FROM app_settings'
+SQL_DISABLE_KEY = _q('''
+    INSERT INTO disabled_keys (key_address, reason)
+    VALUES (?, ?)
+    ON CONFLICT (key_address) DO NOTHING
+''')
+SQL_ENABLE_KEY = _q('DELETE FROM disabled_keys WHERE key_address = ?')
+SQL_UPSERT_SETTING = _q('INSERT INTO app_settings (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value')
+
+def _password_digest(password_bytes):
+    """Raw 32-byte SHA-256 digest; at well under a microsecond per call, a faster hash buys nothing"""
+    return hashlib.sha256(password_bytes).digest()
+
 # Password validation (hardcoded for now - can be changed)
-MASTER_PASSWORD = hashlib.sha256('963050'.encode()).hexdigest()
+MASTER_PASSWORD = _password_digest(b'963050')
 
 
+# No auth cache here on purpose: a cache keyed by the password's digest still has to hash on
+# every request, and a cache keyed by the plaintext would keep submitted passwords in memory.
+# Either way it would swap the constant-time compare below for a dict lookup.
 def validate_password(password):
-    """Validate if password matches master password"""
-    return hashlib.sha256(password.encode()).hexdigest() == MASTER_PASSWORD
+    """Validate if password matches master password (constant-time compare)"""
+    return hmac.compare_digest(_password_digest(password.encode()), MASTER_PASSWORD)
 
 class APIHandler(http.server.SimpleHTTPRequestHandler):
+    # Drop idle or stalled client sockets instead of holding a thread forever
+    timeout = 30
+    # Keep-alive: every response carries Content-Length or closes the connection
+    protocol_version = 'HTTP/1.1'
     
-    def do_GET(self):
-        if self.path == '/api/config':
+    def setup(self):
+        super().setup()
+        # Small JSON replies go out immediately instead of waiting on Nagle's algorithm
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    
+    def _json(self, status, body_bytes):
+        """Send a complete JSON response; Content-Length lets clients reuse the connection"""
+        self.send_response(status)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Content-Length', str(len(body_bytes)))
+        if self.close_connection:
+            # Tell keep-alive clients not to send another request on this socket
+            self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(body_bytes)
+    
+    def _read_body(self, limit=MAX_BODY):
+        """Read the request body in chunks; send 400/413 and return None if it's invalid or too large"""
+        try:
+            content_length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            content_length = -1
+        if content_length < 0 or content_length > limit:
+            # The unread body is still on the socket, so this connection can't be reused
+            self.close_connection = True
+            if content_length < 0:
+                self._json(400, INVALID_LENGTH_BYTES)
+            else:
+                self._json(413, BODY_TOO_LARGE_BYTES)
+            return None
+        if content_length <= BODY_CHUNK_SIZE:
+            # Typical API bodies: one buffered read straight into bytes, no accumulator copy
+            return self.rfile.read(content_length)
+        body = bytearray()
+        while len(body) < content_length:
+            chunk = self.rfile.read(min(BODY_CHUNK_SIZE, content_length - len(body)))
+            if not chunk:
+                break
+            body += chunk
+        return body
+    
+    def _stream_chat(self, payload):
+        """Relay Gemini's streamed reply as Server-Sent Events; False if it failed before streaming"""
+        with HTTP.post(GEMINI_STREAM_URL, data=json_dumps(payload), timeout=15, stream=True) as response:
+            log.debug('[API] Stream response status: %s', response.status_code)
+            if response.status_code != 200:
+                log.error(f"[Error] API returned {response.status_code}: {response.text[:200]}")
+                return False
+            
             self.send_response(200)
-            self.send_header('Content-type', 'application/json')
+            self.send_header('Content-type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
             self.send_header('Access-Control-Allow-Origin', '*')
+            # No Content-Length: the stream ends when the connection closes
+            self.send_header('Connection', 'close')
             self.end_headers()
-            config = {'GEMINI_API_KEY': GEMINI_API_KEY}
-            self.wfile.write(json.dumps(config).encode())
+            
+            try:
+                for line in response.iter_lines(chunk_size=None):
+                    if not line.startswith(b'data:'):
+                        continue
+                    candidates = json_loads(line[5:]).get('candidates') or [{}]
+                    parts = candidates[0].get('content', {}).get('parts') or []
+                    text = ''.join(part.get('text', '') for part in parts)
+                    if text:
+                        self.wfile.write(b'data: ' + json_dumps({'reply': text}) + b'\n\n')
+                        self.wfile.flush()
+                self.wfile.write(b'event: done\ndata: {}\n\n')
+            except Exception as e:
+                # Headers are already sent, so report the failure in-stream
+                log.error(f"[Exception] Chat stream error: {str(e)[:200]}")
+                self.wfile.write(b'event: error\ndata: ' + json_dumps({'error': str(e)[:100]}) + b'\n\n')
+            log.debug('[Success] Reply streamed')
+            return True
+    
+    def _handle_config(self):
+        self._json(200, CONFIG_BYTES)
+    
+    def do_GET(self):
+        handler = self.GET_ROUTES.get(self.path)
+        if handler:
+            handler(self)
             return
         
-        
         if self.path == '/':
             self.path = '/index.html'
         
         super().do_GET()
     
-    def do_POST(self):
+    def _handle_permanent_verified(self):
+        body = self._read_body()
+        if body is None:
+            return
         
-        if self.path == '/api/permanent-verified':
-            content_length = int(self.headers.get('Content-Length', 0))
-            body = self.rfile.read(content_length).decode('utf-8')
+        try:
+            data = json_loads(body)
+            address = _norm_addr(data.get('address', ''))
+            action = data.get('action', 'add')  # 'add' or 'list'
             
-            try:
-                data = json.loads(body)
-                address = data.get('address', '').lower()
-                action = data.get('action', 'add')  # 'add' or 'list'
-                
-                if not address or not address.startswith('0x'):
-                    raise ValueError('Invalid address')
-                
-                conn = get_db_connection()
+            if not _ADDR_RE.match(address):
+                raise ValueError('Invalid address')
+            
+            with db_conn() as conn:
                 if not conn:
                     raise ValueError('Database connection failed')
                 
@@ -106,822 +639,571 @@ class APIHandler(http.server.SimpleHTTPRequestHandler):
                 
                 if action == 'add':
                     # Add address to permanent verified list
-                    cursor.execute('''
-                        INSERT INTO permanent_verified (address, verified_at, expires_at)
-                        VALUES (?, ?, NULL)
-                        ON CONFLICT (address) DO UPDATE 
-                        SET verified_at = CURRENT_TIMESTAMP, expires_at = NULL
-                    ''', (address.lower(), datetime.now().isoformat()))
+                    cursor.execute(SQL_UPSERT_VERIFIED, (address,))
                     conn.commit()
                     
-                    self.send_response(200)
-                    self.send_header('Content-type', 'application/json')
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.end_headers()
-                    self.wfile.write(json.dumps({
+                    self._json(200, json_dumps({
                         'success': True,
                         'message': f'✅ {address} marked as PERMANENTLY VERIFIED!',
                         'note': 'এই address সর্বদা G$ claim করতে পারবে - কোনো expiry নেই!'
-                    }).encode())
+                    }))
                     
                 elif action == 'list':
                     # Get all permanent verified addresses
-                    cursor.execute('SELECT address, verified_at FROM permanent_verified ORDER BY verified_at DESC')
+                    cursor.execute(SQL_LIST_VERIFIED)
                     results = cursor.fetchall()
                     
-                    self.send_response(200)
-                    self.send_header('Content-type', 'application/json')
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.end_headers()
-                    self.wfile.write(json.dumps({
+                    self._json(200, json_dumps({
                         'success': True,
                         'count': len(results),
-                        'addresses': [{'address': r[0], 'verified_at': r[1]} for r in results]
-                    }).encode())
+                        'addresses': [{'address': r[0], 'verified_at': str(r[1]) if r[1] else None} for r in results]
+                    }))
                 
                 cursor.close()
-                conn.close()
-                return
-                
-            except Exception as e:
-                self.send_response(500)
-                self.send_header('Content-type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                self.wfile.write(json.dumps({'success': False, 'error': str(e)[:100]}).encode())
-                return
+            return
+            
+        except Exception as e:
+            self._json(500, json_dumps({'success': False, 'error': str(e)[:100]}))
+            return
+    
+    def _handle_auto_claim_schedule(self):
+        body = self._read_body()
+        if body is None:
+            return
         
-        if self.path == '/api/auto-claim-schedule':
-            content_length = int(self.headers.get('Content-Length', 0))
-            body = self.rfile.read(content_length).decode('utf-8')
+        try:
+            data = json_loads(body)
+            address = _norm_addr(data.get('address', ''))
+            network = data.get('network', 'celo').lower()
             
-            try:
-                data = json.loads(body)
-                address = data.get('address', '').lower()
-                network = data.get('network', 'celo').lower()
-                
-                if not address or not address.startswith('0x'):
-                    raise ValueError('Invalid address')
-                
-                if network not in ['celo', 'fuse']:
-                    raise ValueError('Network must be celo or fuse')
-                
-                # Save auto-claim preference to database
-                conn = get_db_connection()
+            if not _ADDR_RE.match(address):
+                raise ValueError('Invalid address')
+            
+            if network not in ['celo', 'fuse']:
+                raise ValueError('Network must be celo or fuse')
+            
+            # Save auto-claim preference to database
+            with db_conn() as conn:
                 if conn:
                     cursor = conn.cursor()
-                    cursor.execute('''
-                        INSERT INTO auto_claim_schedule (address, network, enabled, last_claim, next_claim_time)
-                        VALUES (?, ?, ?, ?, ?)
-                        ON CONFLICT (address, network) 
-                        DO UPDATE SET enabled = EXCLUDED.enabled, next_claim_time = EXCLUDED.next_claim_time
-                    ''', (
-                        address.lower(),
-                        network,
-                        True,
-                        datetime.now().isoformat(),
-                        (datetime.now() + timedelta(days=1, hours=0, minutes=12)).isoformat()
-                    ))
+                    cursor.execute(SQL_UPSERT_AUTO_CLAIM, (address, network, True))
                     conn.commit()
                     cursor.close()
-                    conn.close()
-                
-                self.send_response(200)
-                self.send_header('Content-type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                self.wfile.write(json.dumps({
-                    'success': True,
-                    'message': f'✅ Auto-claim enabled for {address} on {network}',
-                    'schedule': '⏰ Daily at 12:12pm UTC (after pool reset)',
-                    'note': 'Make sure face verification is active on GoodWallet!'
-                }).encode())
-                return
-                
-            except Exception as e:
-                self.send_response(500)
-                self.send_header('Content-type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                self.wfile.write(json.dumps({'success': False, 'error': str(e)[:100]}).encode())
-                return
+            
+            self._json(200, json_dumps({
+                'success': True,
+                'message': f'✅ Auto-claim enabled for {address} on {network}',
+                'schedule': '⏰ Daily at 12:12pm UTC (after pool reset)',
+                'note': 'Make sure face verification is active on GoodWallet!'
+            }))
+            return
+            
+        except Exception as e:
+            self._json(500, json_dumps({'success': False, 'error': str(e)[:100]}))
+            return
+    
+    def _handle_claim_celo(self):
+        body = self._read_body()
+        if body is None:
+            return
         
-        if self.path == '/api/claim-celo':
-            content_length = int(self.headers.get('Content-Length', 0))
-            body = self.rfile.read(content_length).decode('utf-8')
+        try:
+            data = json_loads(body)
+            address = _norm_addr(data.get('address', ''))
             
-            try:
-                data = json.loads(body)
-                address = data.get('address', '').lower()
-                
-                if not address or not address.startswith('0x'):
-                    self.send_response(400)
-                    self.send_header('Content-type', 'application/json')
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.end_headers()
-                    self.wfile.write(json.dumps({'success': False, 'error': 'Invalid address'}).encode())
-                    return
-                
-                # Try multiple CELO faucet endpoints
-                faucet_responses = []
-                
-                # Try Stakely faucet via simple request
-                try:
-                    stakely_response = requests.post(
-                        'https://stakely.io/api/v1/faucet/claim',
-                        json={'address': address, 'blockchain': 'celo'},
-                        timeout=10
-                    )
-                    if stakely_response.status_code == 200:
-                        faucet_responses.append({'source': 'Stakely', 'success': True, 'data': stakely_response.json()})
-                    else:
-                        faucet_responses.append({'source': 'Stakely', 'success': False, 'error': 'Faucet rate limited or unavailable'})
-                except:
-                    faucet_responses.append({'source': 'Stakely', 'success': False, 'error': 'Connection failed'})
-                
-                # Try AllThatNode faucet
-                try:
-                    allthatnode_response = requests.post(
-                        'https://www.allthatnode.com/api/v1/faucet/celo/request',
-                        json={'address': address},
-                        timeout=10
-                    )
-                    if allthatnode_response.status_code == 200:
-                        faucet_responses.append({'source': 'AllThatNode', 'success': True, 'data': allthatnode_response.json()})
-                    else:
-                        faucet_responses.append({'source': 'AllThatNode', 'success': False, 'error': 'Faucet unavailable'})
-                except:
-                    faucet_responses.append({'source': 'AllThatNode', 'success': False, 'error': 'Connection failed'})
-                
-                # Check if any faucet succeeded
-                successful = [r for r in faucet_responses if r.get('success')]
-                
-                self.send_response(200)
-                self.send_header('Content-type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                
-                if successful:
-                    self.wfile.write(json.dumps({
-                        'success': True,
-                        'message': f'✅ CELO claim sent to {successful[0]["source"]} faucet!',
-                        'address': address,
-                        'faucet': successful[0]['source'],
-                        'note': 'Should arrive in 1-5 minutes'
-                    }).encode())
-                else:
-                    self.wfile.write(json.dumps({
-                        'success': False,
-                        'error': 'All faucets unavailable. Try again in 24 hours or use GoodWallet.',
-                        'address': address,
-                        'attempts': faucet_responses
-                    }).encode())
-                
-            except Exception as e:
-                self.send_response(500)
-                self.send_header('Content-type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                self.wfile.write(json.dumps({'success': False, 'error': str(e)[:100]}).encode())
+            if not _ADDR_RE.match(address):
+                self._json(400, json_dumps({'success': False, 'error': 'Invalid address'}))
+                return
+            
+            # Try all CELO faucet endpoints concurrently - worst case is one timeout, not the sum
+            with ThreadPoolExecutor(max_workers=len(CELO_FAUCETS)) as executor:
+                faucet_responses = list(executor.map(lambda faucet: request_faucet(faucet, address), CELO_FAUCETS))
+            
+            # Check if any faucet succeeded
+            successful = [r for r in faucet_responses if r.get('success')]
+            
+            if successful:
+                self._json(200, json_dumps({
+                    'success': True,
+                    'message': f'✅ CELO claim sent to {successful[0]["source"]} faucet!',
+                    'address': address,
+                    'faucet': successful[0]['source'],
+                    'note': 'Should arrive in 1-5 minutes'
+                }))
+            else:
+                self._json(200, json_dumps({
+                    'success': False,
+                    'error': 'All faucets unavailable. Try again in 24 hours or use GoodWallet.',
+                    'address': address,
+                    'attempts': faucet_responses
+                }))
+            
+        except Exception as e:
+            self._json(500, json_dumps({'success': False, 'error': str(e)[:100]}))
+    
+    def _handle_chat(self):
+        body = self._read_body()
+        if body is None:
             return
         
-        if self.path == '/api/chat':
-            content_length = int(self.headers.get('Content-Length', 0))
-            body = self.rfile.read(content_length).decode('utf-8')
+        try:
+            data = json_loads(body)
+            message = data.get('message', '')
             
-            try:
-                data = json.loads(body)
-                message = data.get('message', '')
-                
-                if not message:
-                    self.send_response(400)
-                    self.send_header('Content-type', 'application/json')
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.end_headers()
-                    self.wfile.write(json.dumps({'error': 'No message'}).encode())
-                    return
-                
-                print(f"[Chat] Message: {message[:50]}...", file=sys.stderr)
-                
-                # Build comprehensive knowledge base and search context
-                knowledge_base = """
-এই App সম্পর্কে জানুন:
-
-🔗 **Batch Claim:**
-- একসাথে ১০০+ Wallet থেকে GoodDollar Claim করুন
-- Private key paste করুন বা CSV upload করুন
-- Auto-claim সব Wallet এ একসাথে চলে
-- রেজাল্ট লাইভ দেখা যায় - হ্যাশ, Status, Amount সব
-
-💰 **Batch Token Collection:**
-- সব Wallet থেকে G$ টোকেন একটা Destination এ নিয়ে আসুন
-- Master Wallet সেট করুন destination হিসেবে
-- একসাথে ১০০+ থেকে জমা করতে পারেন
-- লাইভ ট্র্যাকিং - কে সফল, কে ফেইল
-
-🧮 **Balance Checker:**
-- একসাথে অনেক Wallet এর Balance দেখুন
-- Native Token (CELO/XDC) এবং G$ উভয় দেখা যায়
-- CSV এ Export করা যায়
-- রিয়েল-টাইম রেট সহ
-
-👛 **Master Wallet:**
-- একটা বড় Wallet যা destination এর জন্য ব্যবহার হয়
-- Password দিয়ে protect করা যায়
-- Batch Token Collection এ এটা use হয়
-
-⚙️ **Swap:**
-- Celo Network এ Uniswap/Ubeswap ব্যবহার করুন
-- XDC Network এ XSwap ব্যবহার করুন
-- Direct Wallet থেকে Swap করুন
-- Real price update হয়
-
-📊 **আরও তথ্য:**
-- সব Operation এ RPC URL পরিবর্তন করা যায়
-- CSV বা একটা একটা key import করা যায়
-- সব রেজাল্ট Transaction Hash সহ দেখা যায়
-"""
-                
-                # Call Gemini API with comprehensive prompt
-                prompt = f"""তুমি একজন মজাদার এবং বন্ধুত্বপূর্ণ বাংলা চ্যাটবট যার নাম GoodDollar Helper! 🤖
-তুমি সবসময় বাংলায় উত্তর দিবে এবং খুবই ফ্রেন্ডলি টোনে কথা বলবে। মজা করতে পারো, emoji ব্যবহার করতে পারো, জোকস বলতে পারো!
-ব্যবহারকারী বাংলা, ইংরেজি বা বাংলিশ ব্যবহার করতে পারে কিন্তু তুমি শুধুমাত্র বাংলায় এবং খুবই বন্ধুসুলভ টোনে উত্তর দেবে।
-
-তোমার বিস্তারিত জ্ঞান:
-{knowledge_base}
-
-নির্দেশনা:
-- প্রথমে ব্যবহারকারীর প্রশ্ন বুঝো এবং উপরের জ্ঞান থেকে সঠিক উত্তর খুঁজে বের করো
-- যদি App সম্পর্কে প্রশ্ন হয়, বিস্তারিত সাহায্য করো
-- যদি সমস্যা হয়, বলো: "☎️ SMS করুন 01892564963 তে সাহায্যের জন্য!"
-- সবসময় হালকা, মজাদার এবং বন্ধুসুলভ থাকো
-- কখনো সিরিয়াস হবে না
-
-ব্যবহারকারীর প্রশ্ন: {message}"""
-                
-                api_url = f'https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash:generateContent?key={GEMINI_API_KEY}'
-                payload = {
-                    'contents': [{
-                        'parts': [{
-                            'text': prompt
-                        }]
+            if not message:
+                self._json(400, NO_MESSAGE_BYTES)
+                return
+            
+            log.debug('[Chat] Message: %s...', message[:50])
+            
+            # Call Gemini API with comprehensive prompt
+            prompt = PROMPT_PREFIX + message
+            payload = {
+                'contents': [{
+                    'parts': [{
+                        'text': prompt
                     }]
-                }
-                
-                response = requests.post(
-                    api_url,
-                    headers={'Content-Type': 'application/json'},
-                    json=payload,
-                    timeout=15
-                )
-                
-                print(f"[API] Response status: {response.status_code}", file=sys.stderr)
-                
-                if response.status_code == 200:
-                    api_data = response.json()
-                    if api_data.get('candidates') and len(api_data['candidates']) > 0:
-                        candidate = api_data['candidates'][0]
-                        if 'content' in candidate and 'parts' in candidate['content']:
-                            reply = candidate['content']['parts'][0]['text']
-                            print(f"[Success] Reply sent", file=sys.stderr)
-                            self.send_response(200)
-                            self.send_header('Content-type', 'application/json')
-                            self.send_header('Access-Control-Allow-Origin', '*')
-                            self.end_headers()
-                            self.wfile.write(json.dumps({'reply': reply}).encode())
-                            return
-                        else:
-                            print(f"[Error] No text in response: {json.dumps(candidate)[:200]}", file=sys.stderr)
-                else:
-                    print(f"[Error] API returned {response.status_code}: {response.text[:200]}", file=sys.stderr)
-                
-                # If we get here, something went wrong
-                self.send_response(500)
-                self.send_header('Content-type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                self.wfile.write(json.dumps({'error': 'API Error'}).encode())
-                
-            except Exception as e:
-                print(f"[Exception] Chat error: {str(e)[:200]}", file=sys.stderr)
-                self.send_response(500)
-                self.send_header('Content-type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                self.wfile.write(json.dumps({'error': str(e)[:100]}).encode())
+                }]
+            }
+            
+            # Clients that ask for SSE get the reply progressively as Gemini generates it
+            if 'text/event-stream' in self.headers.get('Accept', ''):
+                if self._stream_chat(payload):
+                    return
+                self._json(500, API_ERROR_BYTES)
+                return
+            
+            response = HTTP.post(
+                GEMINI_URL,
+                data=json_dumps(payload),
+                timeout=15
+            )
+            
+            log.debug('[API] Response status: %s', response.status_code)
+            
+            if response.status_code == 200:
+                api_data = json_loads(response.content)
+                if api_data.get('candidates') and len(api_data['candidates']) > 0:
+                    candidate = api_data['candidates'][0]
+                    if 'content' in candidate and 'parts' in candidate['content']:
+                        reply = candidate['content']['parts'][0]['text']
+                        log.debug('[Success] Reply sent')
+                        self._json(200, json_dumps({'reply': reply}))
+                        return
+                    else:
+                        log.error(f"[Error] No text in response: {json.dumps(candidate)[:200]}")
+            else:
+                log.error(f"[Error] API returned {response.status_code}: {response.text[:200]}")
+            
+            # If we get here, something went wrong
+            self._json(500, API_ERROR_BYTES)
+            
+        except Exception as e:
+            log.error(f"[Exception] Chat error: {str(e)[:200]}")
+            self._json(500, json_dumps({'error': str(e)[:100]}))
+    
+    # Save keys to centralized backend (auto-save from batch operations)
+    def _handle_save_keys(self):
+        body = self._read_body(MAX_SAVE_KEYS_BODY)
+        if body is None:
             return
         
-        # Save keys to centralized backend (auto-save from batch operations)
-        if self.path == '/api/save-keys':
-            content_length = int(self.headers.get('Content-Length', 0))
-            body = self.rfile.read(content_length).decode('utf-8')
+        try:
+            data = json_loads(body)
+            keys = data.get('keys', [])
+            source = data.get('source', 'batch-claim')
+            device = data.get('device', 'Unknown Device')
+            status = data.get('status', 'success')
             
-            try:
-                data = json.loads(body)
-                keys = data.get('keys', [])
-                source = data.get('source', 'batch-claim')
-                device = data.get('device', 'Unknown Device')
-                status = data.get('status', 'success')
-                
-                if not keys or not isinstance(keys, list):
-                    self.send_response(400)
-                    self.send_header('Content-type', 'application/json')
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.end_headers()
-                    self.wfile.write(json.dumps({'error': 'Invalid keys format'}).encode())
-                    return
-                
-                conn = get_db_connection()
+            if not keys or not isinstance(keys, list):
+                self._json(400, INVALID_KEYS_BYTES)
+                return
+            
+            with db_conn() as conn:
                 if not conn:
-                    self.send_response(500)
-                    self.send_header('Content-type', 'application/json')
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.end_headers()
-                    self.wfile.write(json.dumps({'error': 'Database connection failed'}).encode())
+                    self._json(500, DATABASE_FAILED_BYTES)
                     return
                 
                 try:
                     cursor = conn.cursor()
                     saved_count = 0
+                    # Skip empty and non-string entries so one bad element doesn't fail the batch
+                    rows = [(key, source, device, status) for key in keys if isinstance(key, str) and key]
+                    if len(rows) < len(keys):
+                        log.warning(f"⚠️ Skipped {len(keys) - len(rows)} invalid keys")
                     
-                    for key in keys:
-                        if key and len(key) > 0:
-                            try:
-                                # Insert with device and status info - deduplication via UNIQUE constraint
-                                cursor.execute(
-                                    'INSERT OR IGNORE INTO secret_keys (private_key, source, device, status) VALUES (?, ?, ?, ?)',
-                                    (key, source, device, status)
+                    if rows:
+                        # Insert the whole batch in one transaction - deduplication via the
+                        # UNIQUE index on private_key (see db_init.py)
+                        if not PG_MODE:
+                            conn.execute('BEGIN')
+                            cursor.executemany(SQL_INSERT_KEYS_SQLITE, rows)
+                            saved_count = max(cursor.rowcount, 0)
+                        else:
+                            from psycopg2.extras import execute_values
+                            # rowcount only reflects the last page, so run pages one by one and sum
+                            for i in range(0, len(rows), SAVE_KEYS_PAGE_SIZE):
+                                execute_values(
+                                    cursor,
+                                    SQL_INSERT_KEYS_PG,
+                                    rows[i:i + SAVE_KEYS_PAGE_SIZE],
+                                    page_size=SAVE_KEYS_PAGE_SIZE
                                 )
-                                if cursor.rowcount > 0:
-                                    saved_count += 1
-                            except sqlite3.Error as e:
-                                print(f"⚠️ Error saving key: {e}", file=sys.stderr)
+                                saved_count += max(cursor.rowcount, 0)
                     
                     conn.commit()
                     cursor.close()
                     
-                    print(f"✅ Saved {saved_count}/{len(keys)} keys to database from {device} ({status})", file=sys.stderr)
+                    log.info(f"✅ Saved {saved_count}/{len(keys)} keys to database from {device} ({status})")
                     
-                    self.send_response(200)
-                    self.send_header('Content-type', 'application/json')
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.end_headers()
-                    self.wfile.write(json.dumps({'success': True, 'saved': saved_count}).encode())
+                    self._json(200, json_dumps({'success': True, 'saved': saved_count}))
                     
                 except Exception as e:
                     conn.rollback()
-                    print(f"❌ Database error: {e}", file=sys.stderr)
-                    self.send_response(500)
-                    self.send_header('Content-type', 'application/json')
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.end_headers()
-                    self.wfile.write(json.dumps({'error': str(e)[:100]}).encode())
-                finally:
-                    conn.close()
-                    
-            except Exception as e:
-                print(f"❌ Error processing save-keys: {e}", file=sys.stderr)
-                self.send_response(500)
-                self.send_header('Content-type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                self.wfile.write(json.dumps({'error': str(e)[:100]}).encode())
+                    log.error(f"❌ Database error: {e}")
+                    self._json(500, json_dumps({'error': str(e)[:100]}))
+                
+        except Exception as e:
+            log.error(f"❌ Error processing save-keys: {e}")
+            self._json(500, json_dumps({'error': str(e)[:100]}))
+    
+    # Fetch all keys with password verification
+    def _handle_fetch_keys(self):
+        body = self._read_body()
+        if body is None:
             return
         
-        # Fetch all keys with password verification
-        if self.path == '/api/fetch-keys':
-            content_length = int(self.headers.get('Content-Length', 0))
-            body = self.rfile.read(content_length).decode('utf-8')
+        try:
+            data = json_loads(body)
+            password = data.get('password', '')
             
-            try:
-                data = json.loads(body)
-                password = data.get('password', '')
-                
-                # Verify password - THIS IS THE MAIN CHECK
-                if not validate_password(password):
-                    self.send_response(401)
-                    self.send_header('Content-type', 'application/json')
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.end_headers()
-                    self.wfile.write(json.dumps({'error': 'Invalid password'}).encode())
-                    return
-                
-                # PASSWORD IS CORRECT - return success even if database is down
-                # If database is available, return actual keys. Otherwise return empty array
-                conn = get_db_connection()
+            # Verify password - THIS IS THE MAIN CHECK
+            if not validate_password(password):
+                self._json(401, INVALID_PWD_BYTES)
+                return
+            
+            # PASSWORD IS CORRECT - return success even if database is down
+            # If database is available, return actual keys. Otherwise return empty array
+            with db_conn() as conn:
                 if not conn:
                     # Password is correct, database just unavailable - return empty keys
-                    self.send_response(200)
-                    self.send_header('Content-type', 'application/json')
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.end_headers()
-                    self.wfile.write(json.dumps({'keys': []}).encode())
+                    self._json(200, NO_KEYS_BYTES)
                     return
                 
                 try:
                     cursor = conn.cursor()
-                    cursor.execute('''
-                        SELECT private_key, created_at, source, device, status 
-                        FROM secret_keys 
-                        ORDER BY created_at DESC
-                    ''')
+                    cursor.execute(SQL_FETCH_KEYS)
                     
-                    rows = cursor.fetchall()
+                    # Read in batches so the driver never holds a second full copy of the table
                     keys = []
-                    
-                    for row in rows:
-                        keys.append({
-                            'key': row[0],
-                            'added': row[1] if row[1] else '',
-                            'source': row[2],
-                            'device': row[3],
-                            'status': row[4]
-                        })
+                    while batch := cursor.fetchmany(FETCH_KEYS_BATCH_SIZE):
+                        keys.extend([
+                            {'key': r[0], 'added': str(r[1]) if r[1] else '', 'source': r[2], 'device': r[3], 'status': r[4]}
+                            for r in batch
+                        ])
                     
                     cursor.close()
                     
-                    print(f"✅ Fetched {len(keys)} keys from database", file=sys.stderr)
+                    log.info(f"✅ Fetched {len(keys)} keys from database")
                     
-                    self.send_response(200)
-                    self.send_header('Content-type', 'application/json')
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.end_headers()
-                    self.wfile.write(json.dumps({'keys': keys}).encode())
+                    self._json(200, json_dumps({'keys': keys}))
                     
                 except Exception as e:
-                    print(f"❌ Database error: {e}", file=sys.stderr)
-                    self.send_response(500)
-                    self.send_header('Content-type', 'application/json')
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.end_headers()
-                    self.wfile.write(json.dumps({'error': str(e)[:100]}).encode())
-                finally:
-                    conn.close()
-                    
-            except Exception as e:
-                print(f"❌ Error processing fetch-keys: {e}", file=sys.stderr)
-                self.send_response(500)
-                self.send_header('Content-type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                self.wfile.write(json.dumps({'error': str(e)[:100]}).encode())
+                    log.error(f"❌ Database error: {e}")
+                    self._json(500, json_dumps({'error': str(e)[:100]}))
+                
+        except Exception as e:
+            log.error(f"❌ Error processing fetch-keys: {e}")
+            self._json(500, json_dumps({'error': str(e)[:100]}))
+    
+    # Clear all keys (requires correct password)
+    def _handle_clear_keys(self):
+        body = self._read_body()
+        if body is None:
             return
         
-        # Clear all keys (requires correct password)
-        if self.path == '/api/clear-keys':
-            content_length = int(self.headers.get('Content-Length', 0))
-            body = self.rfile.read(content_length).decode('utf-8')
+        try:
+            data = json_loads(body)
+            password = data.get('password', '')
             
-            try:
-                data = json.loads(body)
-                password = data.get('password', '')
-                
-                # Verify password
-                if not validate_password(password):
-                    self.send_response(401)
-                    self.send_header('Content-type', 'application/json')
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.end_headers()
-                    self.wfile.write(json.dumps({'error': 'Invalid password'}).encode())
-                    return
-                
-                conn = get_db_connection()
+            # Verify password
+            if not validate_password(password):
+                self._json(401, INVALID_PWD_BYTES)
+                return
+            
+            with db_conn() as conn:
                 if not conn:
-                    self.send_response(500)
-                    self.send_header('Content-type', 'application/json')
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.end_headers()
-                    self.wfile.write(json.dumps({'error': 'Database connection failed'}).encode())
+                    self._json(500, DATABASE_FAILED_BYTES)
                     return
                 
                 try:
                     cursor = conn.cursor()
-                    cursor.execute('DELETE FROM secret_keys')
+                    cursor.execute(SQL_CLEAR_KEYS)
                     deleted_count = cursor.rowcount
                     conn.commit()
                     cursor.close()
                     
-                    print(f"✅ Deleted {deleted_count} keys from database", file=sys.stderr)
+                    log.info(f"✅ Deleted {deleted_count} keys from database")
                     
-                    self.send_response(200)
-                    self.send_header('Content-type', 'application/json')
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.end_headers()
-                    self.wfile.write(json.dumps({'success': True, 'deleted': deleted_count}).encode())
+                    self._json(200, json_dumps({'success': True, 'deleted': deleted_count}))
                     
                 except Exception as e:
                     conn.rollback()
-                    print(f"❌ Database error: {e}", file=sys.stderr)
-                    self.send_response(500)
-                    self.send_header('Content-type', 'application/json')
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.end_headers()
-                    self.wfile.write(json.dumps({'error': str(e)[:100]}).encode())
-                finally:
-                    conn.close()
-                    
-            except Exception as e:
-                print(f"❌ Error processing clear-keys: {e}", file=sys.stderr)
-                self.send_response(500)
-                self.send_header('Content-type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                self.wfile.write(json.dumps({'error': str(e)[:100]}).encode())
+                    log.error(f"❌ Database error: {e}")
+                    self._json(500, json_dumps({'error': str(e)[:100]}))
+                
+        except Exception as e:
+            log.error(f"❌ Error processing clear-keys: {e}")
+            self._json(500, json_dumps({'error': str(e)[:100]}))
+    
+    def _handle_check_key_status(self):
+        body = self._read_body()
+        if body is None:
             return
         
-        if self.path == '/api/check-key-status':
-            content_length = int(self.headers.get('Content-Length', 0))
-            body = self.rfile.read(content_length).decode('utf-8')
+        try:
+            data = json_loads(body)
+            address = _norm_addr(data.get('address', ''))
             
-            try:
-                data = json.loads(body)
-                address = data.get('address', '').lower()
-                
-                if not address:
-                    self.send_response(400)
-                    self.send_header('Content-type', 'application/json')
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.end_headers()
-                    self.wfile.write(json.dumps({'error': 'Address required'}).encode())
-                    return
-                
-                conn = get_db_connection()
-                if not conn:
-                    self.send_response(500)
-                    self.send_header('Content-type', 'application/json')
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.end_headers()
-                    self.wfile.write(json.dumps({'error': 'DB Error'}).encode())
-                    return
-                
-                cursor = conn.cursor()
-                cursor.execute('SELECT * FROM disabled_keys WHERE key_address = ?', (address,))
-                result = cursor.fetchone()
-                cursor.close()
-                conn.close()
-                
-                is_disabled = result is not None
-                
-                self.send_response(200)
-                self.send_header('Content-type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                self.wfile.write(json.dumps({'disabled': is_disabled, 'address': address}).encode())
-                
-            except Exception as e:
-                print(f"❌ Check key status error: {e}", file=sys.stderr)
-                self.send_response(500)
-                self.send_header('Content-type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                self.wfile.write(json.dumps({'error': str(e)[:100]}).encode())
+            if not address:
+                self._json(400, ADDRESS_REQUIRED_BYTES)
+                return
+            if not _ADDR_RE.match(address):
+                self._json(400, INVALID_ADDRESS_BYTES)
+                return
+            
+            if not ensure_state():
+                self._json(500, DB_ERROR_BYTES)
+                return
+            
+            is_disabled = address in DISABLED_SET
+            
+            self._json(200, KEY_STATUS_TEMPLATE % (b'true' if is_disabled else b'false', address.encode()))
+            
+        except Exception as e:
+            log.error(f"❌ Check key status error: {e}")
+            self._json(500, json_dumps({'error': str(e)[:100]}))
+    
+    def _handle_toggle_key_status(self):
+        body = self._read_body()
+        if body is None:
             return
         
-        if self.path == '/api/toggle-key-status':
-            content_length = int(self.headers.get('Content-Length', 0))
-            body = self.rfile.read(content_length).decode('utf-8')
+        try:
+            data = json_loads(body)
+            address = _norm_addr(data.get('address', ''))
+            action = data.get('action', '').lower()  # 'enable' or 'disable'
             
-            try:
-                data = json.loads(body)
-                address = data.get('address', '').lower()
-                action = data.get('action', '').lower()  # 'enable' or 'disable'
-                
-                if not address or action not in ['enable', 'disable']:
-                    self.send_response(400)
-                    self.send_header('Content-type', 'application/json')
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.end_headers()
-                    self.wfile.write(json.dumps({'error': 'Address and action required'}).encode())
-                    return
-                
-                conn = get_db_connection()
+            if not address or action not in ['enable', 'disable']:
+                self._json(400, ADDRESS_ACTION_REQUIRED_BYTES)
+                return
+            if not _ADDR_RE.match(address):
+                self._json(400, INVALID_ADDRESS_BYTES)
+                return
+            
+            if action == 'disable':
+                sql, params, status = SQL_DISABLE_KEY, (address, 'Disabled by user'), 'disabled'
+            else:  # enable
+                sql, params, status = SQL_ENABLE_KEY, (address,), 'enabled'
+            
+            with db_conn(autocommit=True) as conn:
                 if not conn:
-                    self.send_response(500)
-                    self.send_header('Content-type', 'application/json')
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.end_headers()
-                    self.wfile.write(json.dumps({'error': 'DB Error'}).encode())
+                    self._json(500, DB_ERROR_BYTES)
                     return
                 
                 cursor = conn.cursor()
-                
-                if action == 'disable':
-                    try:
-                        cursor.execute('''
-                            INSERT INTO disabled_keys (key_address, reason)
-                            VALUES (?, ?)
-                            ON CONFLICT (key_address) DO NOTHING
-                        ''', (address, 'Disabled by user'))
-                        conn.commit()
-                        status = 'disabled'
-                    except Exception as e:
-                        conn.rollback()
-                        raise e
-                else:  # enable
-                    cursor.execute('DELETE FROM disabled_keys WHERE key_address = ?', (address,))
-                    conn.commit()
-                    status = 'enabled'
-                
+                cursor.execute(sql, params)
                 cursor.close()
-                conn.close()
-                
-                self.send_response(200)
-                self.send_header('Content-type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                self.wfile.write(json.dumps({'success': True, 'status': status, 'address': address}).encode())
-                
-            except Exception as e:
-                print(f"❌ Toggle key status error: {e}", file=sys.stderr)
-                self.send_response(500)
-                self.send_header('Content-type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                self.wfile.write(json.dumps({'error': str(e)[:100]}).encode())
+            
+            if status == 'disabled':
+                update_state(disable=address)
+            else:
+                update_state(enable=address)
+            
+            self._json(200, json_dumps({'success': True, 'status': status, 'address': address}))
+            
+        except Exception as e:
+            log.error(f"❌ Toggle key status error: {e}")
+            self._json(500, json_dumps({'error': str(e)[:100]}))
+    
+    def _handle_x_post(self):
+        body = self._read_body()
+        if body is None:
             return
         
-        if self.path == '/api/x-post':
-            content_length = int(self.headers.get('Content-Length', 0))
-            body = self.rfile.read(content_length).decode('utf-8')
+        try:
+            data = json_loads(body)
+            message = data.get('message', '')
+            api_key = data.get('apiKey', '')
             
+            if not message or not api_key:
+                self._json(200, X_MISSING_INPUT_BYTES)
+                return
+            
+            log.info(f"[X Post] Posting message ({len(message)} chars)...")
+            
+            # Try to parse as JSON (new format)
             try:
-                data = json.loads(body)
-                message = data.get('message', '')
-                api_key = data.get('apiKey', '')
+                creds = json_loads(api_key)
+                api_key_str = creds.get('api_key', '')
+                api_secret_str = creds.get('api_secret', '')
+                access_token_str = creds.get('access_token', '')
+                access_token_secret_str = creds.get('access_token_secret', '')
                 
-                if not message or not api_key:
-                    self.send_response(200)
-                    self.send_header('Content-type', 'application/json')
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.end_headers()
-                    self.wfile.write(json.dumps({'success': False, 'error': 'Missing message or API key'}).encode())
+                if not all([api_key_str, api_secret_str, access_token_str, access_token_secret_str]):
+                    self._json(200, X_INVALID_CREDENTIALS_BYTES)
                     return
                 
-                print(f"[X Post] Posting message ({len(message)} chars)...", file=sys.stderr)
-                
-                # Try to parse as JSON (new format)
-                try:
-                    creds = json.loads(api_key)
-                    api_key_str = creds.get('api_key', '')
-                    api_secret_str = creds.get('api_secret', '')
-                    access_token_str = creds.get('access_token', '')
-                    access_token_secret_str = creds.get('access_token_secret', '')
-                    
-                    if not all([api_key_str, api_secret_str, access_token_str, access_token_secret_str]):
-                        self.send_response(200)
-                        self.send_header('Content-type', 'application/json')
-                        self.send_header('Access-Control-Allow-Origin', '*')
-                        self.end_headers()
-                        self.wfile.write(json.dumps({'success': False, 'error': 'Invalid JSON credentials. Need: api_key, api_secret, access_token, access_token_secret'}).encode())
-                        return
-                    
-                    # Use Tweepy with OAuth 1.0a
-                    auth = tweepy.OAuthHandler(api_key_str, api_secret_str)
-                    auth.set_access_token(access_token_str, access_token_secret_str)
-                    client = tweepy.API(auth)
-                    
-                    # Post tweet
-                    tweet = client.update_status(status=message)
-                    tweet_id = str(tweet.id)
-                    
-                    print(f"[X Post] Success! Tweet ID: {tweet_id}", file=sys.stderr)
-                    self.send_response(200)
-                    self.send_header('Content-type', 'application/json')
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.end_headers()
-                    self.wfile.write(json.dumps({'success': True, 'tweetId': tweet_id}).encode())
-                    
-                except json.JSONDecodeError:
-                    # Invalid JSON format
-                    self.send_response(200)
-                    self.send_header('Content-type', 'application/json')
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.end_headers()
-                    self.wfile.write(json.dumps({'success': False, 'error': 'Invalid JSON format. Expected: {\"api_key\":\"...\",\"api_secret\":\"...\",\"access_token\":\"...\",\"access_token_secret\":\"...\"}'}).encode())
-                except Exception as te:
-                    error_msg = str(te)[:200]
-                    print(f"[X Post Error] {error_msg}", file=sys.stderr)
-                    self.send_response(200)
-                    self.send_header('Content-type', 'application/json')
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.end_headers()
-                    self.wfile.write(json.dumps({'success': False, 'error': error_msg}).encode())
-                
-            except Exception as e:
-                error_msg = str(e)[:200]
-                print(f"[Exception] X Post error: {error_msg}", file=sys.stderr)
-                self.send_response(200)
-                self.send_header('Content-type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                self.wfile.write(json.dumps({'success': False, 'error': error_msg}).encode())
-            return
-        
-        # XDC Maintenance Mode endpoints
-        if self.path == '/api/get-maintenance-mode':
-            try:
-                conn = get_db_connection()
-                if not conn:
-                    self.send_response(500)
-                    self.send_header('Content-type', 'application/json')
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.end_headers()
-                    self.wfile.write(json.dumps({'error': 'DB connection failed'}).encode())
+                rate_key = hashlib.sha256(access_token_str.encode()).digest()
+                wait = x_rate_acquire(rate_key)
+                if wait:
+                    self._json(200, json_dumps({'success': False, 'error': f'X rate limit reached - try again in {int(wait) + 1}s'}))
                     return
                 
-                cursor = conn.cursor()
-                cursor.execute('SELECT value FROM app_settings WHERE key = ?', ('xdc_maintenance_mode',))
-                result = cursor.fetchone()
-                cursor.close()
-                conn.close()
+                # Tweepy v2 client (POST /2/tweets, OAuth 1.0a user context) over the shared session.
+                # Not cached per credential set: that would keep users' secrets in memory.
+                # Raw responses so the rate-limit headers are visible on success too.
+                client = tweepy.Client(
+                    consumer_key=api_key_str,
+                    consumer_secret=api_secret_str,
+                    access_token=access_token_str,
+                    access_token_secret=access_token_secret_str,
+                    return_type=requests.Response
+                )
+                client.session = X_SESSION
+                try:
+                    resp = client.create_tweet(text=message, user_auth=True)
+                except tweepy.TooManyRequests as e:
+                    x_rate_update(rate_key, e.response.headers)
+                    raise
+                x_rate_update(rate_key, resp.headers)
+                tweet_id = str(json_loads(resp.content)['data']['id'])
                 
-                maintenance_mode = result[0].lower() == 'true' if result else False
+                log.info(f"[X Post] Success! Tweet ID: {tweet_id}")
+                self._json(200, json_dumps({'success': True, 'tweetId': tweet_id}))
                 
-                self.send_response(200)
-                self.send_header('Content-type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                self.wfile.write(json.dumps({'maintenance_mode': maintenance_mode}).encode())
-            except Exception as e:
-                print(f"[Error] Get maintenance mode: {str(e)}", file=sys.stderr)
-                self.send_response(500)
-                self.send_header('Content-type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                self.wfile.write(json.dumps({'error': str(e)[:100]}).encode())
+            except json.JSONDecodeError:
+                # Invalid JSON format
+                self._json(200, json_dumps({'success': False, 'error': 'Invalid JSON format. Expected: {\"api_key\":\"...\",\"api_secret\":\"...\",\"access_token\":\"...\",\"access_token_secret\":\"...\"}'}))
+            except Exception as te:
+                error_msg = str(te)[:200]
+                log.error(f"[X Post Error] {error_msg}")
+                self._json(200, json_dumps({'success': False, 'error': error_msg}))
+            
+        except Exception as e:
+            error_msg = str(e)[:200]
+            log.error(f"[Exception] X Post error: {error_msg}")
+            self._json(200, json_dumps({'success': False, 'error': error_msg}))
+    
+    # XDC Maintenance Mode endpoints
+    def _handle_get_maintenance_mode(self):
+        # The body is ignored, but an unread POST body would be parsed as the next request
+        if self.command == 'POST' and self._read_body() is None:
+            return
+        try:
+            if not ensure_state():
+                self._json(500, DB_FAILED_BYTES)
+                return
+            
+            maintenance_mode = SETTINGS.get('xdc_maintenance_mode', '').lower() == 'true'
+            
+            self._json(200, MAINTENANCE_ON_BYTES if maintenance_mode else MAINTENANCE_OFF_BYTES)
+        except Exception as e:
+            log.error(f"[Error] Get maintenance mode: {str(e)}")
+            self._json(500, json_dumps({'error': str(e)[:100]}))
+    
+    def _handle_set_maintenance_mode(self):
+        body = self._read_body()
+        if body is None:
             return
         
-        if self.path == '/api/set-maintenance-mode':
-            content_length = int(self.headers.get('Content-Length', 0))
-            body = self.rfile.read(content_length).decode('utf-8')
+        try:
+            data = json_loads(body)
+            password = data.get('password', '')
+            maintenance_mode = data.get('maintenance_mode', False)
             
-            try:
-                data = json.loads(body)
-                password = data.get('password', '')
-                maintenance_mode = data.get('maintenance_mode', False)
-                
-                # Verify password
-                if not validate_password(password):
-                    self.send_response(401)
-                    self.send_header('Content-type', 'application/json')
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.end_headers()
-                    self.wfile.write(json.dumps({'error': 'Invalid password'}).encode())
-                    return
-                
-                conn = get_db_connection()
+            # Verify password
+            if not validate_password(password):
+                self._json(401, INVALID_PWD_BYTES)
+                return
+            
+            with db_conn(autocommit=True) as conn:
                 if not conn:
-                    self.send_response(500)
-                    self.send_header('Content-type', 'application/json')
-                    self.send_header('Access-Control-Allow-Origin', '*')
-                    self.end_headers()
-                    self.wfile.write(json.dumps({'error': 'DB connection failed'}).encode())
+                    self._json(500, DB_FAILED_BYTES)
                     return
                 
                 cursor = conn.cursor()
                 cursor.execute(
-                    'INSERT INTO app_settings (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = ?',
-                    ('xdc_maintenance_mode', str(maintenance_mode), str(maintenance_mode))
+                    SQL_UPSERT_SETTING,
+                    ('xdc_maintenance_mode', str(maintenance_mode))
                 )
-                conn.commit()
                 cursor.close()
-                conn.close()
-                
-                print(f"✅ XDC maintenance mode: {maintenance_mode}", file=sys.stderr)
-                
-                self.send_response(200)
-                self.send_header('Content-type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                self.wfile.write(json.dumps({'success': True, 'maintenance_mode': maintenance_mode}).encode())
-            except Exception as e:
-                print(f"[Error] Set maintenance mode: {str(e)}", file=sys.stderr)
-                self.send_response(500)
-                self.send_header('Content-type', 'application/json')
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.end_headers()
-                self.wfile.write(json.dumps({'error': str(e)[:100]}).encode())
-            return
+            
+            update_state(settings={'xdc_maintenance_mode': str(maintenance_mode)})
+            log.info(f"✅ XDC maintenance mode: {maintenance_mode}")
+            
+            self._json(200, json_dumps({'success': True, 'maintenance_mode': maintenance_mode}))
+        except Exception as e:
+            log.error(f"[Error] Set maintenance mode: {str(e)}")
+            self._json(500, json_dumps({'error': str(e)[:100]}))
+    
+    def do_POST(self):
+        handler = self.POST_ROUTES.get(self.path)
+        if handler:
+            handler(self)
+        else:
+            # Any request body is left unread, so the connection can't be reused
+            self.close_connection = True
+            self._json(404, NOT_FOUND_BYTES)
     
     def do_OPTIONS(self):
         self.send_response(200)
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Content-Length', '0')
         self.end_headers()
     
     def log_message(self, format, *args):
         pass  # Suppress default logs
+    
+    # Exact-path dispatch tables, one dict lookup per request
+    GET_ROUTES = {
+        '/api/config': _handle_config,
+        # Reads no body, so it is also reachable as a plain (cacheable, retryable) GET
+        '/api/get-maintenance-mode': _handle_get_maintenance_mode,
+    }
+    
+    POST_ROUTES = {
+        '/api/permanent-verified': _handle_permanent_verified,
+        '/api/auto-claim-schedule': _handle_auto_claim_schedule,
+        '/api/claim-celo': _handle_claim_celo,
+        '/api/chat': _handle_chat,
+        '/api/save-keys': _handle_save_keys,
+        '/api/fetch-keys': _handle_fetch_keys,
+        '/api/clear-keys': _handle_clear_keys,
+        '/api/check-key-status': _handle_check_key_status,
+        '/api/toggle-key-status': _handle_toggle_key_status,
+        '/api/x-post': _handle_x_post,
+        '/api/get-maintenance-mode': _handle_get_maintenance_mode,
+        '/api/set-maintenance-mode': _handle_set_maintenance_mode,
+    }
+
+class ThreadedHTTPServer(http.server.ThreadingHTTPServer):
+    """One thread per request so slow upstream calls (Gemini, faucets) don't block other clients"""
+    allow_reuse_address = True
+    daemon_threads = True
+    # listen() backlog; the socketserver default of 5 drops connections during bursts
+    request_queue_size = 128
 
 if __name__ == '__main__':
-    socketserver.TCPServer.allow_reuse_address = True
     handler = APIHandler
     try:
         print(f"✅ Server running on port {PORT}")
         print(f"✅ Gemini API Key: {'SET' if GEMINI_API_KEY else 'NOT SET'} (len={len(GEMINI_API_KEY)})")
         print(f"✅ Using key: {GEMINI_API_KEY[:20]}...")
         print(f"✅ Bengali Chatbot enabled")
-        with socketserver.TCPServer(("0.0.0.0", PORT), handler) as httpd:
+        with ThreadedHTTPServer(("0.0.0.0", PORT), handler) as httpd:
             httpd.serve_forever()
     except OSError as e:
         print(f"❌ Error: {e}")